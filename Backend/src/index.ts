@@ -1,10 +1,11 @@
-import { PrismaClient } from "@prisma/client";
 import { Cors, Middleware, Server } from "rjweb-server";
 import { Runtime } from "@rjweb/runtime-node";
 import { network } from "@rjweb/utils";
 import { env } from "process";
 import { CronExpressionParser } from "cron-parser";
-import { executeFunction } from "./lib/Runner";
+// Database loads the .env file, so it must come before modules reading env at load time
+import { prisma } from "./lib/Database";
+import { runFunction, startExecutionPool } from "./lib/ExecutionPool";
 import dotenv from "dotenv";
 
 // load env file
@@ -16,11 +17,7 @@ export const REACT_APP_API_URL = env.REACT_APP_API_URL!;
 export const COOKIE = "shsf_session";
 export const DOMAIN = env.DOMAIN!;
 export const API_KEY_HEADER = "x-access-key";
-export const prisma = new PrismaClient({
-	log: ["info", "error", "warn"],
-	errorFormat: "pretty",
-	transactionOptions: { timeout: 30000, maxWait: 20000 },
-});
+export { prisma };
 
 const CORS_DOMAINS = env.CORS_URLS!.split(",");
 CORS_DOMAINS.push(URL);
@@ -62,8 +59,11 @@ export const middleware = new Middleware<{}, {}>("Custom Cors", "1.0.3")
 			);
 
 			// Check if its an exec request
-			if (ctr.url.path.startsWith("/api/exec/")) {
-				// /api/exec/4/02df8773-1d03-48df-9dd7-fd452c5ba592
+			if (
+				ctr.url.path.startsWith("/api/exec/") ||
+				ctr.url.path.startsWith("/api/batch/")
+			) {
+				// /api/exec/4/02df8773-1d03-48df-9dd7-fd452c5ba592 (same layout for /api/batch/)
 				console.log(
 					`[CORS MIDDLEWARE] Custom CORS might change the outcome of this request. (Function Execution Detected)`,
 				);
@@ -168,6 +168,7 @@ server
 	.start()
 	.then(async (port) => {
 		await prisma.$connect();
+		startExecutionPool();
 
 		console.log(`[SHSF API] Running on ${port}`);
 
@@ -266,7 +267,7 @@ async function processCrons() {
 					where: { functionId: cron.functionId },
 				});
 
-				await executeFunction(
+				await runFunction(
 					cron.functionId,
 					cron.function,
 					files,
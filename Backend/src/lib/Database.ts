@@ -0,0 +1,13 @@
+import { PrismaClient } from "@prisma/client";
+import dotenv from "dotenv";
+
+// Kept out of index.ts so library modules can use the client without starting
+// the HTTP server. Only loaded on the API thread, execution workers forward their
+// database calls to it (see ExecutionStore.ts)
+dotenv.config();
+
+export const prisma = new PrismaClient({
+	log: ["info", "error", "warn"],
+	errorFormat: "pretty",
+	transactionOptions: { timeout: 30000, maxWait: 20000 },
+});
@@ -0,0 +1,462 @@
+import { Function, FunctionFile } from "@prisma/client";
+import { Worker } from "worker_threads";
+import * as os from "os";
+import * as path from "path";
+import { env } from "process";
+import {
+	BatchItemResult,
+	ExecutionStore,
+	executeFunction,
+	executeFunctionBatch,
+	setExecutionStore,
+} from "./Runner";
+import { databaseExecutionStore } from "./ExecutionStore";
+
+// Only the API thread talks to the database, workers send their calls here
+setExecutionStore(databaseExecutionStore);
+
+function parseCount(value: string | undefined, fallback: number) {
+	const parsed = parseInt(value ?? "");
+	return isNaN(parsed) || parsed < 0 ? fallback : parsed;
+}
+
+// Number of execution workers, 0 runs executions inline on the API event loop
+const EXECUTION_WORKERS = parseCount(env.EXECUTION_WORKERS, os.cpus().length);
+// Executions are mostly waiting on Docker, so each worker runs several at once
+const EXECUTION_WORKER_CONCURRENCY = Math.max(
+	1,
+	parseCount(env.EXECUTION_WORKER_CONCURRENCY, 16)
+);
+
+// Crashed workers are restarted with exponential backoff, starting at 1s
+const WORKER_RESTART_BASE_DELAY_MS = 1000;
+const WORKER_RESTART_MAX_DELAY_MS = 60 * 1000;
+// After this many crashes in a row a worker counts as failed, it is then only
+// retried every WORKER_RESTART_MAX_DELAY_MS until it stays up again
+const WORKER_MAX_CONSECUTIVE_CRASHES = 5;
+// A worker that stayed up this long no longer counts as crashing in a row
+const WORKER_STABLE_AFTER_MS = 5 * 60 * 1000;
+
+type ExecuteResult = Awaited<ReturnType<typeof executeFunction>>;
+type BatchResult = Awaited<ReturnType<typeof executeFunctionBatch>>;
+
+// Messages sent from the API process to a worker
+export type WorkerRequest =
+	| {
+			type: "execute";
+			jobId: number;
+			id: number;
+			functionData: Function;
+			files: FunctionFile[];
+			stream: boolean;
+			payload: string;
+	  }
+	| {
+			type: "batch";
+			jobId: number;
+			id: number;
+			functionData: Function;
+			files: FunctionFile[];
+			payloads: string[];
+			parallelism: number;
+	  }
+	| { type: "cancel"; jobId: number }
+	| { type: "dbResult"; callId: number; result?: any; error?: string };
+
+// Messages sent from a worker back to the API process
+export type WorkerResponse =
+	| { type: "chunk"; jobId: number; data: string }
+	| { type: "batchItem"; jobId: number; item: BatchItemResult }
+	| { type: "done"; jobId: number; result: any }
+	| { type: "failed"; jobId: number; error: string }
+	| { type: "db"; callId: number; method: keyof ExecutionStore; args: any[] };
+
+// Requests that start a job, as opposed to control messages
+type JobRequest = Extract<WorkerRequest, { type: "execute" | "batch" }>;
+
+interface Job {
+	request: JobRequest;
+	onChunk?: (data: string) => void;
+	onBatchItem?: (item: BatchItemResult) => void;
+	resolve: (result: any) => void;
+	reject: (error: Error) => void;
+	enqueuedAt: number;
+}
+
+interface PoolWorker {
+	id: number;
+	worker: Worker;
+	// "restarting" while waiting out the backoff, "failed" while waiting to be
+	// retried after WORKER_MAX_CONSECUTIVE_CRASHES crashes in a row
+	state: "running" | "restarting" | "failed";
+	active: Map<number, Job>;
+	completed: number;
+	failed: number;
+	restarts: number;
+	consecutiveCrashes: number;
+	startedAt: number;
+}
+
+class ExecutionPool {
+	private workers: PoolWorker[] = [];
+	private queue: Job[] = [];
+	private nextJobId = 1;
+
+	constructor(private size: number, private concurrency: number) {
+		for (let i = 0; i < size; i++) {
+			this.workers.push(this.spawn(i, 0, 0));
+		}
+		console.log(
+			`[SHSF POOL] Started ${size} execution worker(s), ${concurrency} concurrent execution(s) each`
+		);
+	}
+
+	private spawn(
+		id: number,
+		restarts: number,
+		consecutiveCrashes: number
+	): PoolWorker {
+		const poolWorker: PoolWorker = {
+			id,
+			worker: new Worker(path.join(__dirname, "ExecutionWorker.js")),
+			state: "running",
+			active: new Map(),
+			completed: 0,
+			failed: 0,
+			restarts,
+			consecutiveCrashes,
+			startedAt: Date.now(),
+		};
+
+		poolWorker.worker.on("message", (message: WorkerResponse) =>
+			this.handleMessage(poolWorker, message)
+		);
+		poolWorker.worker.on("error", (error) => {
+			console.error(`[SHSF POOL] Execution worker ${id} crashed:`, error);
+		});
+		poolWorker.worker.on("exit", (code) => this.handleExit(poolWorker, code));
+
+		return poolWorker;
+	}
+
+	private handleMessage(poolWorker: PoolWorker, message: WorkerResponse) {
+		if (message.type === "db") {
+			this.handleDatabaseCall(poolWorker, message);
+			return;
+		}
+
+		const job = poolWorker.active.get(message.jobId);
+		if (!job) return;
+
+		switch (message.type) {
+			case "chunk":
+				job.onChunk?.(message.data);
+				break;
+			case "batchItem":
+				job.onBatchItem?.(message.item);
+				break;
+			case "done":
+				poolWorker.active.delete(message.jobId);
+				poolWorker.completed++;
+				job.resolve(message.result);
+				this.dispatch();
+				break;
+			case "failed":
+				poolWorker.active.delete(message.jobId);
+				poolWorker.failed++;
+				job.reject(new Error(message.error));
+				this.dispatch();
+				break;
+		}
+	}
+
+	private async handleDatabaseCall(
+		poolWorker: PoolWorker,
+		message: Extract<WorkerResponse, { type: "db" }>
+	) {
+		let reply: WorkerRequest;
+		try {
+			const method = databaseExecutionStore[message.method] as (
+				...args: any[]
+			) => Promise<any>;
+			const result = await method(...message.args);
+			reply = { type: "dbResult", callId: message.callId, result };
+		} catch (error: any) {
+			reply = {
+				type: "dbResult",
+				callId: message.callId,
+				error: error.message || "Database call failed",
+			};
+		}
+		poolWorker.worker.postMessage(reply);
+	}
+
+	private handleExit(poolWorker: PoolWorker, code: number) {
+		// Executions that were running in the worker are lost
+		for (const job of poolWorker.active.values()) {
+			job.reject(
+				new Error(`Execution worker ${poolWorker.id} exited with code ${code}`)
+			);
+		}
+		poolWorker.active.clear();
+
+		const consecutiveCrashes =
+			Date.now() - poolWorker.startedAt >= WORKER_STABLE_AFTER_MS
+				? 1
+				: poolWorker.consecutiveCrashes + 1;
+		poolWorker.consecutiveCrashes = consecutiveCrashes;
+
+		let delay: number;
+		if (consecutiveCrashes >= WORKER_MAX_CONSECUTIVE_CRASHES) {
+			delay = WORKER_RESTART_MAX_DELAY_MS;
+			poolWorker.state = "failed";
+			console.error(
+				`[SHSF POOL] Execution worker ${poolWorker.id} exited with code ${code}, failed after ${consecutiveCrashes} crashes in a row, retrying in ${delay}ms`
+			);
+			this.rejectQueueIfNoWorkers();
+		} else {
+			delay = Math.min(
+				WORKER_RESTART_BASE_DELAY_MS * 2 ** (consecutiveCrashes - 1),
+				WORKER_RESTART_MAX_DELAY_MS
+			);
+			poolWorker.state = "restarting";
+			console.error(
+				`[SHSF POOL] Execution worker ${poolWorker.id} exited with code ${code}, restarting in ${delay}ms`
+			);
+		}
+
+		setTimeout(() => {
+			this.workers[poolWorker.id] = this.spawn(
+				poolWorker.id,
+				poolWorker.restarts + 1,
+				consecutiveCrashes
+			);
+			this.dispatch();
+		}, delay);
+	}
+
+	// A worker stays unhealthy after hitting the crash limit until it has been up
+	// for WORKER_STABLE_AFTER_MS again
+	private isHealthy(poolWorker: PoolWorker) {
+		if (poolWorker.state === "failed") return false;
+		return (
+			poolWorker.consecutiveCrashes < WORKER_MAX_CONSECUTIVE_CRASHES ||
+			(poolWorker.state === "running" &&
+				Date.now() - poolWorker.startedAt >= WORKER_STABLE_AFTER_MS)
+		);
+	}
+
+	// With every worker failed, queued executions would wait at least a full retry delay
+	private rejectQueueIfNoWorkers() {
+		if (this.workers.some((w) => w.state !== "failed")) return;
+
+		for (const job of this.queue.splice(0)) {
+			job.reject(new Error("No execution workers available"));
+		}
+	}
+
+	// Hands queued jobs to the least busy workers that still have a free slot
+	private dispatch() {
+		while (this.queue.length > 0) {
+			let target: PoolWorker | null = null;
+			for (const poolWorker of this.workers) {
+				if (
+					poolWorker.state === "running" &&
+					poolWorker.active.size < this.concurrency &&
+					(!target || poolWorker.active.size < target.active.size)
+				) {
+					target = poolWorker;
+				}
+			}
+			if (!target) return;
+
+			const job = this.queue.shift()!;
+			target.active.set(job.request.jobId, job);
+			try {
+				target.worker.postMessage(job.request);
+			} catch (error: any) {
+				// e.g. the job data could not be cloned
+				target.active.delete(job.request.jobId);
+				job.reject(error);
+			}
+		}
+	}
+
+	private enqueue(
+		request: JobRequest,
+		handlers: Pick<Job, "onChunk" | "onBatchItem">,
+		signal?: AbortSignal
+	): Promise<any> {
+		return new Promise((resolve, reject) => {
+			const job: Job = {
+				request,
+				...handlers,
+				resolve,
+				reject,
+				enqueuedAt: Date.now(),
+			};
+			signal?.addEventListener("abort", () => this.cancel(job), { once: true });
+			this.queue.push(job);
+			this.rejectQueueIfNoWorkers();
+			this.dispatch();
+		});
+	}
+
+	// Drops a job that is still queued, or tells its worker to stop it
+	private cancel(job: Job) {
+		const queued = this.queue.indexOf(job);
+		if (queued !== -1) {
+			this.queue.splice(queued, 1);
+			job.reject(new Error("Execution cancelled"));
+			return;
+		}
+
+		const jobId = job.request.jobId;
+		const owner = this.workers.find((w) => w.active.get(jobId) === job);
+		owner?.worker.postMessage({ type: "cancel", jobId } satisfies WorkerRequest);
+	}
+
+	execute(
+		id: number,
+		functionData: Function,
+		files: FunctionFile[],
+		stream:
+			| { enabled: true; onChunk: (data: string) => void }
+			| { enabled: false },
+		payload: string
+	): Promise<ExecuteResult> {
+		return this.enqueue(
+			{
+				type: "execute",
+				jobId: this.nextJobId++,
+				id,
+				functionData,
+				files,
+				stream: stream.enabled,
+				payload,
+			},
+			{ onChunk: stream.enabled ? stream.onChunk : undefined }
+		);
+	}
+
+	executeBatch(
+		id: number,
+		functionData: Function,
+		files: FunctionFile[],
+		payloads: string[],
+		parallelism: number,
+		onResult: (item: BatchItemResult) => void,
+		signal?: AbortSignal
+	): Promise<BatchResult> {
+		return this.enqueue(
+			{
+				type: "batch",
+				jobId: this.nextJobId++,
+				id,
+				functionData,
+				files,
+				payloads,
+				parallelism,
+			},
+			{ onBatchItem: onResult },
+			signal
+		);
+	}
+
+	stats() {
+		const now = Date.now();
+		return {
+			mode: "workers" as const,
+			// Unhealthy while any worker is failed or has not recovered from it yet
+			healthy: this.workers.every((w) => this.isHealthy(w)),
+			concurrency: this.concurrency,
+			queueDepth: this.queue.length,
+			oldestQueuedMs: this.queue.length > 0 ? now - this.queue[0].enqueuedAt : 0,
+			inFlight: this.workers.reduce((sum, w) => sum + w.active.size, 0),
+			workers: this.workers.map((w) => ({
+				id: w.id,
+				threadId: w.worker.threadId,
+				state: w.state,
+				healthy: this.isHealthy(w),
+				active: w.active.size,
+				completed: w.completed,
+				failed: w.failed,
+				restarts: w.restarts,
+				consecutiveCrashes: w.consecutiveCrashes,
+				uptimeMs: w.state === "running" ? now - w.startedAt : 0,
+			})),
+		};
+	}
+}
+
+let pool: ExecutionPool | null = null;
+
+// Created on first use so importing this module never spawns threads by itself
+function getPool(): ExecutionPool {
+	if (!pool) {
+		pool = new ExecutionPool(EXECUTION_WORKERS, EXECUTION_WORKER_CONCURRENCY);
+	}
+	return pool;
+}
+
+// Spawns the workers up front so the first execution does not pay for it
+export function startExecutionPool() {
+	if (EXECUTION_WORKERS > 0) {
+		getPool();
+	}
+}
+
+// Same signature as executeFunction, but runs it on an execution worker
+export async function runFunction(
+	id: number,
+	functionData: Function,
+	files: FunctionFile[],
+	stream:
+		| { enabled: true; onChunk: (data: string) => void }
+		| { enabled: false },
+	payload: string
+): Promise<ExecuteResult> {
+	if (EXECUTION_WORKERS === 0) {
+		return executeFunction(id, functionData, files, stream, payload);
+	}
+	return getPool().execute(id, functionData, files, stream, payload);
+}
+
+// Same signature as executeFunctionBatch, but runs it on an execution worker
+export async function runFunctionBatch(
+	id: number,
+	functionData: Function,
+	files: FunctionFile[],
+	payloads: string[],
+	parallelism: number,
+	onResult: (item: BatchItemResult) => void,
+	signal?: AbortSignal
+): Promise<BatchResult> {
+	if (EXECUTION_WORKERS === 0) {
+		return executeFunctionBatch(
+			id,
+			functionData,
+			files,
+			payloads,
+			parallelism,
+			onResult,
+			signal
+		);
+	}
+	return getPool().executeBatch(
+		id,
+		functionData,
+		files,
+		payloads,
+		parallelism,
+		onResult,
+		signal
+	);
+}
+
+export function getExecutionPoolStats() {
+	if (EXECUTION_WORKERS === 0) {
+		return { mode: "inline" as const, healthy: true };
+	}
+	return getPool().stats();
+}
@@ -0,0 +1,96 @@
+import { randomBytes } from "crypto";
+import { prisma } from "./Database";
+import type { ExecutionStore, TimingEntry } from "./Runner";
+
+// Database side of function executions. Only ever loaded on the API thread:
+// execution workers reach it through messages (see ExecutionPool.ts), so the
+// process keeps a single Prisma connection pool no matter how many workers run.
+
+// Token expiry for execution tokens (in milliseconds)
+const FUNCTION_DB_TOKEN_EXPIRY_MS = 24 * 60 * 60 * 1000; // 24 hours
+// Reasonable DB field size limit
+const DB_FIELD_LIMIT = 10000;
+
+async function getOrCreateFunctionDbToken(userId: number): Promise<string> {
+	const tokenName = `__function_db_access__`;
+
+	// Try to find existing valid token
+	const existingToken = await prisma.accessToken.findFirst({
+		where: {
+			userId: userId,
+			name: tokenName,
+			hidden: true,
+			expiresAt: {
+				gt: new Date(), // Not expired
+			},
+		},
+	});
+
+	if (existingToken) {
+		return existingToken.token;
+	}
+
+	// Create new token with 24 hour expiry
+	const newToken = randomBytes(32).toString("hex");
+
+	await prisma.accessToken.create({
+		data: {
+			userId: userId,
+			name: tokenName,
+			token: newToken,
+			hidden: true,
+			purpose: "Shared database access token for all function executions",
+			expiresAt: new Date(Date.now() + FUNCTION_DB_TOKEN_EXPIRY_MS),
+		},
+	});
+
+	return newToken;
+}
+
+function truncateForDb(text: string) {
+	return text.length > DB_FIELD_LIMIT
+		? text.substring(0, DB_FIELD_LIMIT) + "...[truncated for DB]"
+		: text;
+}
+
+async function recordExecution(
+	id: number,
+	entry: {
+		logs: string;
+		exit_code: number;
+		tooks: TimingEntry[];
+		output: string;
+		payload: string;
+	}
+) {
+	try {
+		await prisma.function.update({
+			where: { id },
+			data: { lastRun: new Date() },
+		});
+	} catch (dbError) {
+		console.error("Error updating function lastRun:", dbError);
+	}
+
+	try {
+		await prisma.triggerLog.create({
+			data: {
+				functionId: id,
+				logs: truncateForDb(entry.logs),
+				result: JSON.stringify({
+					exit_code: entry.exit_code,
+					tooks: entry.tooks,
+					output: truncateForDb(entry.output),
+					payload: truncateForDb(entry.payload),
+				}),
+			},
+		});
+	} catch (error) {
+		console.error("Error creating trigger log:", error);
+	}
+}
+
+export const databaseExecutionStore: ExecutionStore = {
+	getOrCreateFunctionDbToken,
+	recordExecution,
+};
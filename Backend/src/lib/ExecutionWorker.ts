@@ -0,0 +1,95 @@
+import { parentPort } from "worker_threads";
+import {
+	ExecutionStore,
+	executeFunction,
+	executeFunctionBatch,
+	setExecutionStore,
+} from "./Runner";
+// Type-only, loading ExecutionPool here would open a database connection pool
+import type { WorkerRequest, WorkerResponse } from "./ExecutionPool";
+
+// Entry point of an execution worker thread (see ExecutionPool.ts).
+// Runs executions off the API event loop and streams their output back.
+
+const post = (message: WorkerResponse) => parentPort!.postMessage(message);
+
+// Database calls are answered by the API thread, workers hold no connections
+const pendingDbCalls = new Map<
+	number,
+	{ resolve: (result: any) => void; reject: (error: Error) => void }
+>();
+let nextDbCallId = 1;
+
+function callDatabase(method: keyof ExecutionStore, args: any[]): Promise<any> {
+	return new Promise((resolve, reject) => {
+		const callId = nextDbCallId++;
+		pendingDbCalls.set(callId, { resolve, reject });
+		post({ type: "db", callId, method, args });
+	});
+}
+
+setExecutionStore({
+	getOrCreateFunctionDbToken: (userId) =>
+		callDatabase("getOrCreateFunctionDbToken", [userId]),
+	recordExecution: (id, entry) => callDatabase("recordExecution", [id, entry]),
+});
+
+// Batches that can still be cancelled, by job id
+const cancellers = new Map<number, AbortController>();
+
+parentPort!.on("message", async (message: WorkerRequest) => {
+	if (message.type === "dbResult") {
+		const call = pendingDbCalls.get(message.callId);
+		pendingDbCalls.delete(message.callId);
+		if (message.error !== undefined) {
+			call?.reject(new Error(message.error));
+		} else {
+			call?.resolve(message.result);
+		}
+		return;
+	}
+
+	const jobId = message.jobId;
+
+	if (message.type === "cancel") {
+		cancellers.get(jobId)?.abort();
+		return;
+	}
+
+	try {
+		let result;
+		if (message.type === "execute") {
+			result = await executeFunction(
+				message.id,
+				message.functionData,
+				message.files,
+				message.stream
+					? {
+							enabled: true,
+							onChunk: (data) => post({ type: "chunk", jobId, data }),
+					  }
+					: { enabled: false },
+				message.payload
+			);
+		} else {
+			const controller = new AbortController();
+			cancellers.set(jobId, controller);
+			try {
+				result = await executeFunctionBatch(
+					message.id,
+					message.functionData,
+					message.files,
+					message.payloads,
+					message.parallelism,
+					(item) => post({ type: "batchItem", jobId, item }),
+					controller.signal
+				);
+			} finally {
+				cancellers.delete(jobId);
+			}
+		}
+		post({ type: "done", jobId, result });
+	} catch (error: any) {
+		post({ type: "failed", jobId, error: error.message || "Execution failed" });
+	}
+});
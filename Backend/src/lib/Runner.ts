@@ -1,23 +1,50 @@
 import { Function, FunctionFile } from "@prisma/client";
 import Docker from "dockerode";
 import { PassThrough } from "stream"; // Added PassThrough
-import { API_URL, prisma } from "..";
 import { HttpRequestContext } from "rjweb-server";
 import { DataContext } from "rjweb-server/lib/typings/types/internal";
 import { UsableMiddleware } from "rjweb-server/lib/typings/classes/Middleware";
 import * as fs from "fs/promises";
 import * as fsSync from "fs";
 import * as path from "path";
-import { randomBytes } from "crypto";
+import { env } from "process";
 
-interface TimingEntry {
+export interface TimingEntry {
 	timestamp: number;
 	value: number;
 	description: string;
 }
 
-// Token expiry for execution tokens (in milliseconds)
-const FUNCTION_DB_TOKEN_EXPIRY_MS = 24 * 60 * 60 * 1000; // 24 hours
+// Database access needed while executing a function. Runner never talks to Prisma
+// itself: the API thread uses the database directly (see ExecutionStore.ts), execution
+// workers forward the calls to the API thread so only it holds a connection pool.
+export interface ExecutionStore {
+	getOrCreateFunctionDbToken(userId: number): Promise<string>;
+	// Bumps the function's lastRun and writes one TriggerLog for a finished execution
+	recordExecution(
+		id: number,
+		entry: {
+			logs: string;
+			exit_code: number;
+			tooks: TimingEntry[];
+			output: string;
+			payload: string;
+		}
+	): Promise<void>;
+}
+
+let executionStore: ExecutionStore | null = null;
+
+export function setExecutionStore(store: ExecutionStore) {
+	executionStore = store;
+}
+
+function getExecutionStore(): ExecutionStore {
+	if (!executionStore) {
+		throw new Error("No execution store configured");
+	}
+	return executionStore;
+}
 
 const ServeOnlyFileNotFoundHTML = `<html><head><title>File Not Found</title></head><body><h1>404 - File Not Found</h1><p>The requested HTML file was not found in the function's files.</p></body></html>`;
 
@@ -486,110 +513,21 @@ func (db *Database) Exists(storageName, key string) bool {
 }
 `;
 
-async function getOrCreateFunctionDbToken(userId: number): Promise<string> {
-	const tokenName = `__function_db_access__`;
-
-	// Try to find existing valid token
-	const existingToken = await prisma.accessToken.findFirst({
-		where: {
-			userId: userId,
-			name: tokenName,
-			hidden: true,
-			expiresAt: {
-				gt: new Date(), // Not expired
-			},
-		},
-	});
-
-	if (existingToken) {
-		return existingToken.token;
-	}
-
-	// Create new token with 24 hour expiry
-	const newToken = randomBytes(32).toString("hex");
-
-	await prisma.accessToken.create({
-		data: {
-			userId: userId,
-			name: tokenName,
-			token: newToken,
-			hidden: true,
-			purpose: "Shared database access token for all function executions",
-			expiresAt: new Date(Date.now() + FUNCTION_DB_TOKEN_EXPIRY_MS),
-		},
-	});
-
-	return newToken;
-}
-
-export async function executeFunction(
-	id: number,
+// Syncs the function's files and generated runner scripts into its persistent
+// app directory, then makes sure the function container exists and is running.
+// Shared by single and batch executions so both pay the same warm-up cost once.
+async function prepareFunctionContainer(
+	docker: Docker,
 	functionData: Function,
 	files: FunctionFile[],
-	stream:
-		| { enabled: true; onChunk: (data: string) => void }
-		| { enabled: false },
-	payload: string
-) {
-	const starting_time = Date.now();
-	const tooks: TimingEntry[] = [];
-	let func_result: string = ""; // Stores the JSON string result from the function
-	let logs: string = ""; // Stores logs from the function execution
-
-	const recordTiming = (() => {
-		let lastTimestamp = starting_time;
-		return (description: string) => {
-			const currentTimestamp = Date.now();
-			const value = (currentTimestamp - lastTimestamp) / 1000;
-			tooks.push({ timestamp: currentTimestamp, value, description });
-			console.log(`[SHSF CRONS] ${description}: ${value.toFixed(3)} seconds`);
-		};
-	})();
-
-	// Serve Only HTML (serve-only)
-	if (functionData.startup_file?.endsWith(".html")) {
-		return {
-			logs: "Serve Only HTML function executed.",
-			result: {
-				_shsf: "v2",
-				_headers: { "Content-Type": "text/html; charset=utf-8" },
-				_code: 200,
-				_res:
-					files.find((f) => f.name === functionData.startup_file)?.content ||
-					ServeOnlyFileNotFoundHTML,
-			},
-			tooks: [
-				{
-					description: "Serve Only HTML function executed.",
-					value: 0,
-					timestamp: starting_time,
-				},
-			] as TimingEntry[],
-			exit_code: 0,
-		};
-	}
-
-	const docker = new Docker();
+	recordTiming: (description: string) => void
+): Promise<Docker.Container> {
 	let dbAccessToken = ""; // Keep for cleanup logic, but won't be deleted anymore
 	const functionIdStr = String(functionData.id);
 	const containerName = `shsf_func_${functionIdStr}`;
 	// Persistent directory on the host for this function's app files
 	const funcAppDir = path.join("/opt/shsf_data/functions", functionIdStr, "app");
 	const runtimeType = functionData.image.split(":")[0];
-	let exitCode = 0; // Default exit code
-
-	// Generate a unique execution ID for this request to avoid race conditions
-	// Use crypto.randomUUID() for better uniqueness if available, otherwise fallback
-	const executionId =
-		typeof crypto !== "undefined" && typeof crypto.randomUUID === "function"
-			? crypto.randomUUID()
-			: `${Date.now()}_${Math.random().toString(36).substring(2, 11)}`;
-	const executionDir = path.join(
-		"/opt/shsf_data/functions",
-		functionIdStr,
-		"executions",
-		executionId
-	);
 
 	// Define startupFile and initScript here as they are needed for script generation
 	const startupFile = functionData.startup_file;
@@ -597,34 +535,30 @@ export async function executeFunction(
 	let initScript =
 		"#!/bin/sh\nset -e\necho '[SHSF INIT] Starting environment setup...'\ncd /app\n";
 
-	try {
-		let container = docker.getContainer(containerName);
-		let containerJustCreated = false;
+	let container = docker.getContainer(containerName);
+	let containerJustCreated = false;
 
-		// Ensure function app directory exists
-		await fs.mkdir(funcAppDir, { recursive: true });
+	// Ensure function app directory exists
+	await fs.mkdir(funcAppDir, { recursive: true });
 
-		// Create unique execution directory for this request
-		await fs.mkdir(executionDir, { recursive: true });
-		recordTiming("Created unique execution directory");
+	// Always update the user files regardless of container state
+	recordTiming("Updating function files");
+	await Promise.all(
+		files.map(async (file) => {
+			const filePath = path.join(funcAppDir, file.name);
+			await fs.writeFile(filePath, file.content);
+		})
+	);
+	recordTiming("User files written to host app directory");
 
-		// Always update the user files regardless of container state
-		recordTiming("Updating function files");
-		await Promise.all(
-			files.map(async (file) => {
-				const filePath = path.join(funcAppDir, file.name);
-				await fs.writeFile(filePath, file.content);
-			})
-		);
-		recordTiming("User files written to host app directory");
-
-		// For Go runtime, generate the runner wrapper file and go.mod if needed
-		if (runtimeType === "golang") {
-			const runnerWrapperCode = `package main
+	// For Go runtime, generate the runner wrapper file and go.mod if needed
+	if (runtimeType === "golang") {
+		const runnerWrapperCode = `package main
 
 import (
 	"encoding/json"
 	"fmt"
+	"io"
 	"os"
 )
 
@@ -665,6 +599,56 @@ func runFunction(payloadPath string, out *os.File) error {
 	return nil
 }
 
+// callUser runs main_user and turns a panic into an error so one bad payload
+// does not abort the rest of a batch
+func callUser(payload interface{}) (result interface{}, err error) {
+	defer func() {
+		if r := recover(); r != nil {
+			err = fmt.Errorf("panic in main function: %v", r)
+		}
+	}()
+	return main_user(payload)
+}
+
+// Batch wrapper: reads {"index": n, "payload": ...} objects from batchPath and
+// writes one "SHSF_BATCH_ITEM <json>" line per payload to out
+func runBatch(batchPath string, out *os.File) error {
+	f, err := os.Open(batchPath)
+	if err != nil {
+		return fmt.Errorf("error opening batch file: %w", err)
+	}
+	defer f.Close()
+	
+	dec := json.NewDecoder(f)
+	for {
+		var item map[string]interface{}
+		if err := dec.Decode(&item); err == io.EOF {
+			return nil
+		} else if err != nil {
+			return fmt.Errorf("error decoding batch payload JSON: %w", err)
+		}
+		
+		entry := map[string]interface{}{"index": item["index"], "ok": true}
+		result, err := callUser(item["payload"])
+		if err != nil {
+			fmt.Fprintf(os.Stderr, "[SHSF BATCH] Error in item %v: %v\\n", item["index"], err)
+			entry = map[string]interface{}{"index": item["index"], "ok": false, "error": err.Error()}
+		} else {
+			entry["result"] = result
+		}
+		
+		entryJSON, err := json.Marshal(entry)
+		if err != nil {
+			entryJSON, _ = json.Marshal(map[string]interface{}{
+				"index": item["index"],
+				"ok":    false,
+				"error": fmt.Sprintf("error serializing result: %v", err),
+			})
+		}
+		fmt.Fprintf(out, "SHSF_BATCH_ITEM %s\\n", entryJSON)
+	}
+}
+
 func main() {
 	// Redirect user's stdout to stderr so logs don't interfere with result
 	oldStdout := os.Stdout
@@ -677,6 +661,18 @@ func main() {
 	
 	payloadPath := os.Args[1]
 	
+	if payloadPath == "--batch" {
+		if len(os.Args) < 3 {
+			fmt.Fprintln(os.Stderr, "Error: Batch file path not provided")
+			os.Exit(1)
+		}
+		if err := runBatch(os.Args[2], oldStdout); err != nil {
+			fmt.Fprintln(os.Stderr, err)
+			os.Exit(1)
+		}
+		return
+	}
+	
 	// Do NOT restore stdout here for user code execution.
 	// This ensures fmt.Println in user code goes to stderr (logs).
 	
@@ -688,23 +684,23 @@ func main() {
 	}
 }
 `;
-			await fs.writeFile(path.join(funcAppDir, "shsf_runner.go"), runnerWrapperCode);
-			
-			// Generate go.mod if it doesn't exist
-			const goModPath = path.join(funcAppDir, "go.mod");
-			if (!fsSync.existsSync(goModPath)) {
-				const goModContent = `module shsf_function_${functionData.id}\n\ngo 1.23\n`;
-				await fs.writeFile(goModPath, goModContent);
-				recordTiming("Generated default go.mod file");
-			}
-			
-			recordTiming("Go runner wrapper (shsf_runner.go) written to host app directory");
+		await fs.writeFile(path.join(funcAppDir, "shsf_runner.go"), runnerWrapperCode);
+		
+		// Generate go.mod if it doesn't exist
+		const goModPath = path.join(funcAppDir, "go.mod");
+		if (!fsSync.existsSync(goModPath)) {
+			const goModContent = `module shsf_function_${functionData.id}\n\ngo 1.23\n`;
+			await fs.writeFile(goModPath, goModContent);
+			recordTiming("Generated default go.mod file");
 		}
+		
+		recordTiming("Go runner wrapper (shsf_runner.go) written to host app directory");
+	}
 
-		// Always generate/update the runner script to accept payload file path as argument
-		if (runtimeType === "python") {
-			const wrapperPath = path.join(funcAppDir, "_runner.py");
-			const wrapperContent = `#!/bin/sh
+	// Always generate/update the runner script to accept payload file path as argument
+	if (runtimeType === "python") {
+		const wrapperPath = path.join(funcAppDir, "_runner.py");
+		const wrapperContent = `#!/bin/sh
 # Source environment variables if the file exists
 if [ -f /app/.shsf_env ]; then
     . /app/.shsf_env
@@ -714,7 +710,8 @@ else
 fi
 
 # Execute the actual Python runner with payload file path as argument
-python3 - "$@" << 'PYTHON_SCRIPT_EOF'
+# (exec keeps the PID, so batch runners can be killed by the PID they record)
+exec python3 - "$@" << 'PYTHON_SCRIPT_EOF'
 import json
 import sys
 import os
@@ -734,6 +731,46 @@ sys.stdout = sys.stderr
 sys.path.append('/app')
 target_module_name = "${startupFile.replace(".py", "")}"
 
+# Batch mode: "--batch <file>" where <file> holds one {"index": n, "payload": ...}
+# JSON object per line. The module is imported once and main() is called for every
+# payload; each outcome is written as a single "SHSF_BATCH_ITEM <json>" line.
+if payload_file_path == "--batch":
+    if len(sys.argv) < 3:
+        sys.stderr.write("Error: Batch file path not provided\\n")
+        sys.exit(1)
+    try:
+        original_name_val = __name__
+        __name__ = 'imported_module'
+        target_module = __import__(target_module_name)
+        __name__ = original_name_val # Restore __name__
+    except Exception as e:
+        sys.stderr.write(f"Error importing module {target_module_name} or during initial setup: {str(e)}\\n")
+        traceback.print_exc(file=sys.stderr)
+        sys.exit(1)
+    if not (hasattr(target_module, 'main') and callable(target_module.main)):
+        sys.stderr.write(f"No 'main' function found in {target_module_name}.py\\n")
+        sys.exit(1)
+    with open(sys.argv[2], 'r') as batch_file:
+        for line in batch_file:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            try:
+                item_payload = item.get("payload")
+                if item_payload is not None:
+                    item_result = target_module.main(item_payload)
+                else:
+                    item_result = target_module.main()
+                serialized = json.dumps({"index": item["index"], "ok": True, "result": item_result})
+            except Exception as e:
+                sys.stderr.write(f"[SHSF BATCH] Error in item {item['index']}: {str(e)}\\n")
+                traceback.print_exc(file=sys.stderr)
+                serialized = json.dumps({"index": item["index"], "ok": False, "error": str(e)})
+            original_stdout.write("SHSF_BATCH_ITEM " + serialized + "\\n")
+            original_stdout.flush()
+    sys.stdout = original_stdout
+    sys.exit(0)
+
 # Read payload from the specified file
 run_data = None
 try:
@@ -798,14 +835,14 @@ finally:
     sys.stdout = original_stdout
 PYTHON_SCRIPT_EOF
 `;
-			await fs.writeFile(wrapperPath, wrapperContent);
-			await fs.chmod(wrapperPath, "755");
-			recordTiming(
-				"Python runner script (_runner.py) written to host app directory"
-			);
-		} else if (runtimeType === "golang") {
-			const wrapperPath = path.join(funcAppDir, "_runner.sh");
-			const wrapperContent = `#!/bin/sh
+		await fs.writeFile(wrapperPath, wrapperContent);
+		await fs.chmod(wrapperPath, "755");
+		recordTiming(
+			"Python runner script (_runner.py) written to host app directory"
+		);
+	} else if (runtimeType === "golang") {
+		const wrapperPath = path.join(funcAppDir, "_runner.sh");
+		const wrapperContent = `#!/bin/sh
 # Source environment variables if the file exists
 if [ -f /app/.shsf_env ]; then
     . /app/.shsf_env
@@ -815,24 +852,25 @@ else
 fi
 
 # Execute the compiled Go binary with payload file path as argument
-/app/_shsf_runner "$@"
+# (exec keeps the PID, so batch runners can be killed by the PID they record)
+exec /app/_shsf_runner "$@"
 `;
-			await fs.writeFile(wrapperPath, wrapperContent);
-			await fs.chmod(wrapperPath, "755");
-			recordTiming(
-				"Go runner script (_runner.sh) written to host app directory"
-			);
-		} else {
-			console.warn(
-				`[executeFunction] Runner script generation skipped: Unsupported runtime type '${runtimeType}' for function ${functionData.id}.`
-			);
-		}
+		await fs.writeFile(wrapperPath, wrapperContent);
+		await fs.chmod(wrapperPath, "755");
+		recordTiming(
+			"Go runner script (_runner.sh) written to host app directory"
+		);
+	} else {
+		console.warn(
+			`[prepareFunctionContainer] Runner script generation skipped: Unsupported runtime type '${runtimeType}' for function ${functionData.id}.`
+		);
+	}
 
-		// Always generate/update the init.sh script
-		if (runtimeType === "python") {
-			// Add ffmpeg installation if requested
-			if (functionData.ffmpeg_install) {
-				initScript += `
+	// Always generate/update the init.sh script
+	if (runtimeType === "python") {
+		// Add ffmpeg installation if requested
+		if (functionData.ffmpeg_install) {
+			initScript += `
       echo "[SHSF INIT] Checking ffmpeg installation..."
       if [ ! -f ".already_installed_ffmpeg" ]; then
           command -v ffmpeg >/dev/null 2>&1 || (apt update && apt-get install -y ffmpeg && touch /app/.already_installed_ffmpeg)
@@ -841,9 +879,9 @@ fi
       fi
       echo "[SHSF INIT] ffmpeg check complete."
       `;
-			}
+		}
 
-			initScript += `
+		initScript += `
 if [ -f "requirements.txt" ]; then 
 	echo "[SHSF INIT] Setting up Python environment for function ${functionData.id}"
 	VENV_DIR="/pip-cache/venv/function-${functionData.id}" 
@@ -879,10 +917,10 @@ if [ -f "requirements.txt" ]; then
 fi
 echo "[SHSF INIT] Python setup complete."
 `;
-		} else if (runtimeType === "golang") {
-			// Add ffmpeg installation if requested
-			if (functionData.ffmpeg_install) {
-				initScript += `
+	} else if (runtimeType === "golang") {
+		// Add ffmpeg installation if requested
+		if (functionData.ffmpeg_install) {
+			initScript += `
       echo "[SHSF INIT] Checking ffmpeg installation..."
       if [ ! -f ".already_installed_ffmpeg" ]; then
           command -v ffmpeg >/dev/null 2>&1 || (apt update && apt-get install -y ffmpeg && touch /app/.already_installed_ffmpeg)
@@ -891,9 +929,9 @@ echo "[SHSF INIT] Python setup complete."
       fi
       echo "[SHSF INIT] ffmpeg check complete."
       `;
-			}
+		}
 
-			initScript += `
+		initScript += `
 echo "[SHSF INIT] Setting up Go environment for function ${functionData.id}"
 BIN_DIR="/go-cache/bin/function-${functionData.id}"
 HASH_FILE="/go-cache/hashes/function-${functionData.id}/go.hash"
@@ -964,182 +1002,353 @@ echo "export GOMODCACHE=$GO_PKG_CACHE_DIR/mod" >> /app/.shsf_env
 echo "export PATH=/app:\$PATH" >> /app/.shsf_env
 echo "[SHSF INIT] Go setup complete."
 `;
-		} else {
-			// This was already checked for runner script, but as a safeguard for init.sh:
-			console.warn(
-				`[executeFunction] init.sh script generation skipped: Unsupported runtime type '${runtimeType}' for function ${functionData.id}.`
+	} else {
+		// This was already checked for runner script, but as a safeguard for init.sh:
+		console.warn(
+			`[prepareFunctionContainer] init.sh script generation skipped: Unsupported runtime type '${runtimeType}' for function ${functionData.id}.`
+		);
+		// Potentially throw an error if an unsupported runtime should halt execution.
+		// throw new Error(`Unsupported runtime type for init script generation: ${runtimeType}`);
+	}
+	initScript +=
+		"\necho '[SHSF INIT] Environment setup finished successfully.'\n";
+	await fs.writeFile(path.join(funcAppDir, "init.sh"), initScript);
+	await fs.chmod(path.join(funcAppDir, "init.sh"), "755");
+	recordTiming("init.sh script generated on host");
+
+	// Check if any file contains _db_com, and if so, setup DB communication
+	const requiresDbCom = files.some((file) => file.content.includes("_db_com"));
+	if (requiresDbCom) {
+		// Get or create a shared 24-hour token for this user's functions
+		dbAccessToken = await getExecutionStore().getOrCreateFunctionDbToken(
+			functionData.userId
+		);
+		recordTiming("Database access token retrieved/created");
+
+		// Read from env at call time (not from index.ts) so Runner can be loaded by
+		// execution workers, and before index.ts has loaded the .env file
+		const apiUrl = env.REACT_APP_API_URL!;
+
+		// Add Database Communication Script based on runtime
+		if (runtimeType === "python") {
+			const dbScript = DbComScriptPY.replace("{{API}}", apiUrl).replace(
+				"{{AUTHKEY}}",
+				dbAccessToken
+			);
+			await fs.writeFile(path.join(funcAppDir, "_db_com.py"), dbScript);
+			await fs.chmod(path.join(funcAppDir, "_db_com.py"), "755");
+			recordTiming("Database communication script (Python) generated on host");
+		} else if (runtimeType === "golang") {
+			const dbScript = DbComScriptGO.replace("{{API}}", apiUrl).replace(
+				"{{AUTHKEY}}",
+				dbAccessToken
 			);
-			// Potentially throw an error if an unsupported runtime should halt execution.
-			// throw new Error(`Unsupported runtime type for init script generation: ${runtimeType}`);
+			await fs.writeFile(path.join(funcAppDir, "_db_com.go"), dbScript);
+			await fs.chmod(path.join(funcAppDir, "_db_com.go"), "755");
+			recordTiming("Database communication script (Golang) generated on host");
 		}
-		initScript +=
-			"\necho '[SHSF INIT] Environment setup finished successfully.'\n";
-		await fs.writeFile(path.join(funcAppDir, "init.sh"), initScript);
-		await fs.chmod(path.join(funcAppDir, "init.sh"), "755");
-		recordTiming("init.sh script generated on host");
-
-		// Check if any file contains _db_com, and if so, setup DB communication
-		const requiresDbCom = files.some((file) => file.content.includes("_db_com"));
-		if (requiresDbCom) {
-			// Get or create a shared 24-hour token for this user's functions
-			dbAccessToken = await getOrCreateFunctionDbToken(functionData.userId);
-			recordTiming("Database access token retrieved/created");
-
-			// Add Database Communication Script based on runtime
+	}
+
+	try {
+		const inspectInfo = await container.inspect();
+		if (!inspectInfo.State.Running) {
+			recordTiming("Starting existing stopped container");
+			await container.start();
+			recordTiming("Container started");
+		} else {
+			recordTiming("Found existing running container");
+		}
+		
+		// For existing containers, ensure init.sh runs again to rebuild if needed
+		// This ensures Go binaries are always up-to-date
+		if (runtimeType === "golang") {
+			recordTiming("Running init.sh on existing container");
+			const initExec = await container.exec({
+				Cmd: ["/bin/sh", "/app/init.sh"],
+				AttachStdout: true,
+				AttachStderr: true,
+			});
+			const initStream = await initExec.start({ hijack: true, stdin: false });
+			const initOutput = { stdout: "", stderr: "" };
+			
+			const initStdout = new PassThrough();
+			const initStderr = new PassThrough();
+			
+			initStdout.on("data", (chunk) => {
+				initOutput.stdout += chunk.toString("utf8");
+			});
+			initStderr.on("data", (chunk) => {
+				initOutput.stderr += chunk.toString("utf8");
+			});
+			
+			docker.modem.demuxStream(initStream, initStdout, initStderr);
+			
+			await new Promise<void>((resolve) => {
+				initStream.on("end", resolve);
+			});
+			
+			console.log("[SHSF Init Output]:", initOutput.stderr);
+			recordTiming("Init script executed on existing container");
+		}
+	} catch (error: any) {
+		if (error.statusCode === 404) {
+			// Container not found, create it
+			containerJustCreated = true;
+			recordTiming("Container not found, preparing for creation");
+
+			// Cache directories setup on host (ensure these base paths exist)
+			const baseCacheDir = "/opt/shsf_data/cache"; // Centralized cache on host
+			await fs.mkdir(baseCacheDir, { recursive: true });
+			const pipCacheHost = path.join(baseCacheDir, "pip");
+			const goCacheHost = path.join(baseCacheDir, "go");
+
+			await Promise.all([
+				fs.mkdir(pipCacheHost, { recursive: true }),
+				fs.mkdir(goCacheHost, { recursive: true })
+			]);
+			recordTiming("Host cache directories ensured");
+
+			// Mount the base function directory which contains both app/ and executions/
+			const funcBaseDir = path.join("/opt/shsf_data/functions", functionIdStr);
+			// Mount /app and /executions separately instead of the old /function_data
+			let BINDS: string[] = [
+				`${funcBaseDir}/app:/app`,
+				`${funcBaseDir}/executions:/executions`,
+			];
+
+			if (functionData.docker_mount) {
+				BINDS.push("/var/run/docker.sock:/var/run/docker.sock"); // Mount Docker socket
+			}
+
 			if (runtimeType === "python") {
-				const dbScript = DbComScriptPY.replace("{{API}}", API_URL!).replace(
-					"{{AUTHKEY}}",
-					dbAccessToken
-				);
-				await fs.writeFile(path.join(funcAppDir, "_db_com.py"), dbScript);
-				await fs.chmod(path.join(funcAppDir, "_db_com.py"), "755");
-				recordTiming("Database communication script (Python) generated on host");
+				BINDS.push(`${pipCacheHost}:/pip-cache`); // Mount persistent pip cache
 			} else if (runtimeType === "golang") {
-				const dbScript = DbComScriptGO.replace("{{API}}", API_URL!).replace(
-					"{{AUTHKEY}}",
-					dbAccessToken
+				BINDS.push(`${goCacheHost}:/go-cache`); // Mount persistent go cache
+			} else {
+				throw new Error(
+					`Unsupported runtime type for container BIND setup: ${runtimeType}`
 				);
-				await fs.writeFile(path.join(funcAppDir, "_db_com.go"), dbScript);
-				await fs.chmod(path.join(funcAppDir, "_db_com.go"), "755");
-				recordTiming("Database communication script (Golang) generated on host");
 			}
-		}
 
-		try {
-			const inspectInfo = await container.inspect();
-			if (!inspectInfo.State.Running) {
-				recordTiming("Starting existing stopped container");
-				await container.start();
-				recordTiming("Container started");
-			} else {
-				recordTiming("Found existing running container");
-			}
-			
-			// For existing containers, ensure init.sh runs again to rebuild if needed
-			// This ensures Go binaries are always up-to-date
-			if (runtimeType === "golang") {
-				recordTiming("Running init.sh on existing container");
-				const initExec = await container.exec({
-					Cmd: ["/bin/sh", "/app/init.sh"],
-					AttachStdout: true,
-					AttachStderr: true,
-				});
-				const initStream = await initExec.start({ hijack: true, stdin: false });
-				const initOutput = { stdout: "", stderr: "" };
-				
-				const initStdout = new PassThrough();
-				const initStderr = new PassThrough();
-				
-				initStdout.on("data", (chunk) => {
-					initOutput.stdout += chunk.toString("utf8");
-				});
-				initStderr.on("data", (chunk) => {
-					initOutput.stderr += chunk.toString("utf8");
-				});
-				
-				docker.modem.demuxStream(initStream, initStdout, initStderr);
-				
-				await new Promise<void>((resolve) => {
-					initStream.on("end", resolve);
+			// Image pull logic (same as original)
+			const imageStart = Date.now();
+			let imagePulled = false;
+			try {
+				const imageExists = await docker.listImages({
+					filters: JSON.stringify({ reference: [functionData.image] }),
 				});
-				
-				console.log("[SHSF Init Output]:", initOutput.stderr);
-				recordTiming("Init script executed on existing container");
-			}
-		} catch (error: any) {
-			if (error.statusCode === 404) {
-				// Container not found, create it
-				containerJustCreated = true;
-				recordTiming("Container not found, preparing for creation");
-
-				// Cache directories setup on host (ensure these base paths exist)
-				const baseCacheDir = "/opt/shsf_data/cache"; // Centralized cache on host
-				await fs.mkdir(baseCacheDir, { recursive: true });
-				const pipCacheHost = path.join(baseCacheDir, "pip");
-				const goCacheHost = path.join(baseCacheDir, "go");
-
-				await Promise.all([
-					fs.mkdir(pipCacheHost, { recursive: true }),
-					fs.mkdir(goCacheHost, { recursive: true })
-				]);
-				recordTiming("Host cache directories ensured");
-
-				// Mount the base function directory which contains both app/ and executions/
-				const funcBaseDir = path.join("/opt/shsf_data/functions", functionIdStr);
-				// Mount /app and /executions separately instead of the old /function_data
-				let BINDS: string[] = [
-					`${funcBaseDir}/app:/app`,
-					`${funcBaseDir}/executions:/executions`,
-				];
-
-				if (functionData.docker_mount) {
-					BINDS.push("/var/run/docker.sock:/var/run/docker.sock"); // Mount Docker socket
+				if (imageExists.length === 0) {
+					imagePulled = true;
+					recordTiming("Pulling image: " + functionData.image);
+					const pullStream = await docker.pull(functionData.image);
+					await new Promise((resolve, reject) => {
+						docker.modem.followProgress(pullStream, (err) =>
+							err ? reject(err) : resolve(null)
+						);
+					});
 				}
+			} catch (imgError) {
+				console.error("Error checking or pulling image:", imgError);
+				throw imgError;
+			}
+			recordTiming(imagePulled ? "Image pull complete" : "Image check complete");
+
+			const initialEnv = functionData.env
+				? JSON.parse(functionData.env).map(
+						(env: { name: string; value: any }) => `${env.name}=${env.value}`
+				  )
+				: [];
+
+			container = await docker.createContainer({
+				Image: functionData.image,
+				name: containerName,
+				Env: initialEnv,
+				HostConfig: {
+					Binds: BINDS,
+					AutoRemove: false, // CRITICAL: Container is persistent
+					Memory: (functionData.max_ram || 128) * 1024 * 1024,
+				},
+				// Run init.sh once, then keep container alive
+				Cmd: [
+					"/bin/sh",
+					"-c",
+					"/app/init.sh && echo '[SHSF] Container initialized and idling.' && tail -f /dev/null",
+				],
+				Tty: false, // No TTY needed for background container
+			});
+			recordTiming("Container created");
+			await container.start();
+			recordTiming("New container started after init");
+		} else {
+			// Some other error inspecting container
+			throw error;
+		}
+	}
 
-				if (runtimeType === "python") {
-					BINDS.push(`${pipCacheHost}:/pip-cache`); // Mount persistent pip cache
-				} else if (runtimeType === "golang") {
-					BINDS.push(`${goCacheHost}:/go-cache`); // Mount persistent go cache
-				} else {
-					throw new Error(
-						`Unsupported runtime type for container BIND setup: ${runtimeType}`
-					);
-				}
+	return container;
+}
 
-				// Image pull logic (same as original)
-				const imageStart = Date.now();
-				let imagePulled = false;
-				try {
-					const imageExists = await docker.listImages({
-						filters: JSON.stringify({ reference: [functionData.image] }),
-					});
-					if (imageExists.length === 0) {
-						imagePulled = true;
-						recordTiming("Pulling image: " + functionData.image);
-						const pullStream = await docker.pull(functionData.image);
-						await new Promise((resolve, reject) => {
-							docker.modem.followProgress(pullStream, (err) =>
-								err ? reject(err) : resolve(null)
-							);
-						});
-					}
-				} catch (imgError) {
-					console.error("Error checking or pulling image:", imgError);
-					throw imgError;
+// 3MB limit to stay under Docker's 4MB limit
+const MAX_OUTPUT_SIZE = 3 * 1024 * 1024;
+
+function createTimingRecorder(
+	tooks: TimingEntry[],
+	startingTime: number,
+	label: string
+) {
+	let lastTimestamp = startingTime;
+	return (description: string) => {
+		const currentTimestamp = Date.now();
+		const value = (currentTimestamp - lastTimestamp) / 1000;
+		tooks.push({ timestamp: currentTimestamp, value, description });
+		console.log(`[${label}] ${description}: ${value.toFixed(3)} seconds`);
+	};
+}
+
+// Generate a unique execution ID for this request to avoid race conditions
+// Use crypto.randomUUID() for better uniqueness if available, otherwise fallback
+function createExecutionDir(functionData: Function) {
+	const executionId =
+		typeof crypto !== "undefined" && typeof crypto.randomUUID === "function"
+			? crypto.randomUUID()
+			: `${Date.now()}_${Math.random().toString(36).substring(2, 11)}`;
+	const executionDir = path.join(
+		"/opt/shsf_data/functions",
+		String(functionData.id),
+		"executions",
+		executionId
+	);
+	return { executionId, executionDir };
+}
+
+async function removeExecutionDir(
+	executionDir: string,
+	recordTiming: (description: string) => void
+) {
+	try {
+		await fs.rm(executionDir, { recursive: true, force: true });
+		recordTiming("Cleaned up execution directory");
+	} catch (cleanupError: any) {
+		if (cleanupError.code === "EACCES") {
+			console.error(
+				`[removeExecutionDir] Permission denied when cleaning up execution directory ${executionDir}:`,
+				cleanupError
+			);
+		} else if (cleanupError.code === "EBUSY") {
+			console.error(
+				`[removeExecutionDir] Directory in use, could not clean up execution directory ${executionDir}:`,
+				cleanupError
+			);
+		} else {
+			console.error(
+				`[removeExecutionDir] Error cleaning up execution directory ${executionDir}:`,
+				cleanupError
+			);
+		}
+	}
+}
+
+// Serve Only HTML (serve-only)
+function serveOnlyHTMLResult(functionData: Function, files: FunctionFile[]) {
+	return {
+		_shsf: "v2",
+		_headers: { "Content-Type": "text/html; charset=utf-8" },
+		_code: 200,
+		_res:
+			files.find((f) => f.name === functionData.startup_file)?.content ||
+			ServeOnlyFileNotFoundHTML,
+	};
+}
+
+// Collects exec output up to MAX_OUTPUT_SIZE and appends truncationNote once when cut off
+function createOutputBuffer(truncationNote: string) {
+	const buffer = {
+		text: "",
+		truncated: false,
+		append(chunk: string) {
+			if (buffer.text.length + chunk.length <= MAX_OUTPUT_SIZE) {
+				buffer.text += chunk;
+			} else if (!buffer.truncated) {
+				const remaining = MAX_OUTPUT_SIZE - buffer.text.length;
+				if (remaining > 0) {
+					buffer.text += chunk.substring(0, remaining);
 				}
-				recordTiming(imagePulled ? "Image pull complete" : "Image check complete");
-
-				const initialEnv = functionData.env
-					? JSON.parse(functionData.env).map(
-							(env: { name: string; value: any }) => `${env.name}=${env.value}`
-					  )
-					: [];
-
-				container = await docker.createContainer({
-					Image: functionData.image,
-					name: containerName,
-					Env: initialEnv,
-					HostConfig: {
-						Binds: BINDS,
-						AutoRemove: false, // CRITICAL: Container is persistent
-						Memory: (functionData.max_ram || 128) * 1024 * 1024,
-					},
-					// Run init.sh once, then keep container alive
-					Cmd: [
-						"/bin/sh",
-						"-c",
-						"/app/init.sh && echo '[SHSF] Container initialized and idling.' && tail -f /dev/null",
-					],
-					Tty: false, // No TTY needed for background container
-				});
-				recordTiming("Container created");
-				await container.start();
-				recordTiming("New container started after init");
-			} else {
-				// Some other error inspecting container
-				throw error;
+				buffer.text += truncationNote;
+				buffer.truncated = true;
 			}
+		},
+	};
+	return buffer;
+}
+
+// Add function-specific env vars to exec as well, in case they are needed by the runner script directly
+// and not just by the init.sh environment.
+function buildExecEnv(functionData: Function): string[] {
+	const execEnv: string[] = []; // Remove RUN_DATA from env
+	if (functionData.env) {
+		try {
+			const parsedEnv = JSON.parse(functionData.env);
+			if (Array.isArray(parsedEnv)) {
+				parsedEnv.forEach((envVar: { name: string; value: any }) =>
+					execEnv.push(`${envVar.name}=${envVar.value}`)
+				);
+			}
+		} catch (e) {
+			console.error("Failed to parse functionData.env for exec:", e);
 		}
+	}
+	return execEnv;
+}
+
+export async function executeFunction(
+	id: number,
+	functionData: Function,
+	files: FunctionFile[],
+	stream:
+		| { enabled: true; onChunk: (data: string) => void }
+		| { enabled: false },
+	payload: string
+) {
+	const starting_time = Date.now();
+	const tooks: TimingEntry[] = [];
+	let func_result: string = ""; // Stores the JSON string result from the function
+	let logs: string = ""; // Stores logs from the function execution
+
+	const recordTiming = createTimingRecorder(tooks, starting_time, "SHSF CRONS");
+
+	// Serve Only HTML (serve-only)
+	if (functionData.startup_file?.endsWith(".html")) {
+		return {
+			logs: "Serve Only HTML function executed.",
+			result: serveOnlyHTMLResult(functionData, files),
+			tooks: [
+				{
+					description: "Serve Only HTML function executed.",
+					value: 0,
+					timestamp: starting_time,
+				},
+			] as TimingEntry[],
+			exit_code: 0,
+		};
+	}
+
+	const docker = new Docker();
+	const runtimeType = functionData.image.split(":")[0];
+	let exitCode = 0; // Default exit code
+
+	const { executionId, executionDir } = createExecutionDir(functionData);
+
+	try {
+		// Create unique execution directory for this request
+		await fs.mkdir(executionDir, { recursive: true });
+		recordTiming("Created unique execution directory");
+
+		const container = await prepareFunctionContainer(
+			docker,
+			functionData,
+			files,
+			recordTiming
+		);
 
 		// At this point, container is running (either existing or newly created and initialized)
 		// Now, execute the function logic using docker exec
@@ -1149,21 +1358,7 @@ echo "[SHSF INIT] Go setup complete."
 		await fs.writeFile(payloadFilePath, payload);
 		recordTiming("Payload written to unique execution file");
 
-		const execEnv: string[] = []; // Remove RUN_DATA from env
-		// Add function-specific env vars to exec as well, in case they are needed by the runner script directly
-		// and not just by the init.sh environment.
-		if (functionData.env) {
-			try {
-				const parsedEnv = JSON.parse(functionData.env);
-				if (Array.isArray(parsedEnv)) {
-					parsedEnv.forEach((envVar: { name: string; value: any }) =>
-						execEnv.push(`${envVar.name}=${envVar.value}`)
-					);
-				}
-			} catch (e) {
-				console.error("Failed to parse functionData.env for exec:", e);
-			}
-		}
+		const execEnv = buildExecEnv(functionData);
 
 		// Pass the unique payload file path as an argument to the runner script
 		const containerPayloadPath = `/executions/${executionId}/payload.json`; // Updated to use /executions mount
@@ -1190,44 +1385,27 @@ echo "[SHSF INIT] Go setup complete."
 		const execStream = await exec.start({ hijack: true, stdin: false });
 		recordTiming("Exec started");
 
-		const execOutput = { stdout: "", stderr: "" };
-		const MAX_OUTPUT_SIZE = 3 * 1024 * 1024; // 3MB limit to stay under Docker's 4MB limit
-		let stdoutTruncated = false;
-		let stderrTruncated = false;
+		const execOutput = {
+			stdout: createOutputBuffer(
+				"\n[SHSF TRUNCATED] Output exceeded 3MB limit and was truncated"
+			),
+			stderr: createOutputBuffer(
+				"\n[SHSF TRUNCATED] Logs exceeded 3MB limit and were truncated"
+			),
+		};
 
 		const stdoutMultiplex = new PassThrough();
 		const stderrMultiplex = new PassThrough();
 
 		stdoutMultiplex.on("data", (chunk) => {
-			const text = chunk.toString("utf8");
-			if (execOutput.stdout.length + text.length <= MAX_OUTPUT_SIZE) {
-				execOutput.stdout += text;
-			} else if (!stdoutTruncated) {
-				const remaining = MAX_OUTPUT_SIZE - execOutput.stdout.length;
-				if (remaining > 0) {
-					execOutput.stdout += text.substring(0, remaining);
-				}
-				execOutput.stdout +=
-					"\n[SHSF TRUNCATED] Output exceeded 3MB limit and was truncated";
-				stdoutTruncated = true;
-			}
+			execOutput.stdout.append(chunk.toString("utf8"));
 		});
 
 		stderrMultiplex.on("data", (chunk) => {
 			const text = chunk.toString("utf8");
-			if (execOutput.stderr.length + text.length <= MAX_OUTPUT_SIZE) {
-				execOutput.stderr += text;
-			} else if (!stderrTruncated) {
-				const remaining = MAX_OUTPUT_SIZE - execOutput.stderr.length;
-				if (remaining > 0) {
-					execOutput.stderr += text.substring(0, remaining);
-				}
-				execOutput.stderr +=
-					"\n[SHSF TRUNCATED] Logs exceeded 3MB limit and were truncated";
-				stderrTruncated = true;
-			}
+			execOutput.stderr.append(text);
 
-			if (stream.enabled && !stderrTruncated) {
+			if (stream.enabled && !execOutput.stderr.truncated) {
 				const ansiRegex = /\x1B\[[0-9;]*[A-Za-z]/g;
 				const nonPrintableRegex = /[^\x20-\x7E\n\r\t]/g;
 				const cleanText = text
@@ -1260,12 +1438,12 @@ echo "[SHSF INIT] Go setup complete."
 		try {
 			execResultDetails = await Promise.race([execPromise, timeoutPromise]);
 			exitCode = execResultDetails.ExitCode ?? 1; // Default to 1 if null/undefined
-			logs = execOutput.stderr;
-			if (exitCode === 0 && execOutput.stdout) {
-				func_result = execOutput.stdout.trim();
+			logs = execOutput.stderr.text;
+			if (exitCode === 0 && execOutput.stdout.text) {
+				func_result = execOutput.stdout.text.trim();
 			} else if (exitCode !== 0) {
 				// Combine outputs but respect size limits
-				const combinedOutput = `Exit Code: ${exitCode}\n${execOutput.stderr}\n${execOutput.stdout}`;
+				const combinedOutput = `Exit Code: ${exitCode}\n${execOutput.stderr.text}\n${execOutput.stdout.text}`;
 				logs =
 					combinedOutput.length > MAX_OUTPUT_SIZE
 						? combinedOutput.substring(0, MAX_OUTPUT_SIZE) +
@@ -1280,7 +1458,7 @@ echo "[SHSF INIT] Go setup complete."
 				"[executeFunction] Exec failed or timed out:",
 				execError.message
 			);
-			logs = `${execOutput.stderr}\nExecution Error: ${execError.message}`;
+			logs = `${execOutput.stderr.text}\nExecution Error: ${execError.message}`;
 			exitCode = -1;
 			func_result = "";
 		}
@@ -1370,27 +1548,7 @@ echo "[SHSF INIT] Go setup complete."
 		recordTiming("Finalizing execution log");
 
 		// Clean up the unique execution directory
-		try {
-			await fs.rm(executionDir, { recursive: true, force: true });
-			recordTiming("Cleaned up execution directory");
-		} catch (cleanupError: any) {
-			if (cleanupError.code === "EACCES") {
-				console.error(
-					`[executeFunction] Permission denied when cleaning up execution directory ${executionDir}:`,
-					cleanupError
-				);
-			} else if (cleanupError.code === "EBUSY") {
-				console.error(
-					`[executeFunction] Directory in use, could not clean up execution directory ${executionDir}:`,
-					cleanupError
-				);
-			} else {
-				console.error(
-					`[executeFunction] Error cleaning up execution directory ${executionDir}:`,
-					cleanupError
-				);
-			}
-		}
+		await removeExecutionDir(executionDir, recordTiming);
 
 		// Container and funcAppDir are not removed here as they are persistent.
 		// Cleanup of old/unused containers/directories would be a separate process/tool.
@@ -1403,48 +1561,379 @@ echo "[SHSF INIT] Go setup complete."
 			} seconds`
 		);
 
-		try {
-			await prisma.function.update({
-				where: { id },
-				data: { lastRun: new Date() },
-			});
-		} catch (dbError) {
-			console.error("Error updating function lastRun:", dbError);
-		}
-
-		try {
-			// Ensure func_result is a string for the DB, even if it's an error message or empty
-			const resultForDb =
+		// Ensure func_result is a string for the DB, even if it's an error message or empty
+		await getExecutionStore().recordExecution(id, {
+			logs,
+			exit_code: exitCode,
+			tooks,
+			output:
 				typeof func_result === "string" && func_result !== ""
 					? func_result
-					: JSON.stringify(null);
-			const DB_FIELD_LIMIT = 10000; // Reasonable DB field size limit
-
-			await prisma.triggerLog.create({
-				data: {
-					functionId: id,
-					logs:
-						logs.length > DB_FIELD_LIMIT
-							? logs.substring(0, DB_FIELD_LIMIT) + "...[truncated for DB]"
-							: logs,
-					result: JSON.stringify({
-						exit_code: exitCode,
-						tooks: tooks,
-						output:
-							resultForDb.length > DB_FIELD_LIMIT
-								? resultForDb.substring(0, DB_FIELD_LIMIT) + "...[truncated for DB]"
-								: resultForDb,
-						payload:
-							payload.length > DB_FIELD_LIMIT
-								? payload.substring(0, DB_FIELD_LIMIT) + "...[truncated for DB]"
-								: payload,
-					}),
-				},
-			});
-		} catch (error) {
-			console.error("Error creating trigger log:", error);
+					: JSON.stringify(null),
+			payload,
+		});
+	}
+}
+
+// Upper bound for how many runner processes a single batch may start in parallel
+export const MAX_BATCH_PARALLELISM = 16;
+// Upper bound for how many payloads a single batch request may contain
+export const MAX_BATCH_SIZE = 10000;
+// Hard cap on the wall time of a whole batch, independent of its size
+export const MAX_BATCH_RUNTIME_MS = 60 * 60 * 1000; // 1 hour
+
+// Kills a batch runner by the PID it wrote into its pid file when it started
+async function killBatchRunner(
+	docker: Docker,
+	container: Docker.Container,
+	pidFilePath: string
+) {
+	try {
+		const pid = (await fs.readFile(pidFilePath, "utf8")).trim();
+		if (!/^\d+$/.test(pid)) return;
+
+		const killExec = await container.exec({
+			Cmd: ["/bin/sh", "-c", `kill -9 ${pid}`],
+			AttachStdout: true,
+			AttachStderr: true,
+			Tty: false,
+		});
+		const killStream = await killExec.start({ hijack: true, stdin: false });
+		await new Promise<void>((resolve) => {
+			killStream.on("end", resolve);
+			killStream.on("error", () => resolve());
+			killStream.resume();
+		});
+	} catch (error: any) {
+		console.error(
+			`[killBatchRunner] Could not kill batch runner (${pidFilePath}):`,
+			error.message
+		);
+	}
+}
+
+export interface BatchItemResult {
+	index: number;
+	exit_code: number;
+	result: any;
+	error?: string;
+}
+
+// Runs many payloads through one warm function container. The container is prepared
+// once, payloads are split across `parallelism` runner processes which each import the
+// user code once, and every result is handed to onResult as soon as it is available
+// (completion order). A single aggregated TriggerLog is written for the whole batch.
+// Aborting `signal` skips runners that have not started yet and kills the running ones.
+export async function executeFunctionBatch(
+	id: number,
+	functionData: Function,
+	files: FunctionFile[],
+	payloads: string[], // JSON encoded payloads, one per invocation
+	parallelism: number,
+	onResult: (item: BatchItemResult) => void,
+	signal?: AbortSignal
+) {
+	const starting_time = Date.now();
+	const tooks: TimingEntry[] = [];
+	// Combined logs of all runner processes
+	const logs = createOutputBuffer(
+		"\n[SHSF TRUNCATED] Logs exceeded 3MB limit and were truncated"
+	);
+	let exitCode = 0; // Non-zero if any runner process failed
+	const reported = new Set<number>();
+	let succeeded = 0;
+
+	const recordTiming = createTimingRecorder(tooks, starting_time, "SHSF BATCH");
+
+	const report = (item: BatchItemResult) => {
+		if (reported.has(item.index)) return;
+		reported.add(item.index);
+		if (item.exit_code === 0) succeeded++;
+		// Nobody is listening anymore once the batch was cancelled
+		if (!signal?.aborted) onResult(item);
+	};
+
+	const workerCount = Math.max(
+		1,
+		Math.min(parallelism, MAX_BATCH_PARALLELISM, payloads.length)
+	);
+
+	// Serve Only HTML (serve-only): every payload gets the same static page
+	if (functionData.startup_file?.endsWith(".html")) {
+		const result = serveOnlyHTMLResult(functionData, files);
+		payloads.forEach((_, index) => report({ index, exit_code: 0, result }));
+		return {
+			logs: "Serve Only HTML function executed.",
+			tooks,
+			exit_code: 0,
+			total: payloads.length,
+			succeeded,
+			failed: payloads.length - succeeded,
+		};
+	}
+
+	const docker = new Docker();
+	const runtimeType = functionData.image.split(":")[0];
+
+	const { executionId, executionDir } = createExecutionDir(functionData);
+
+	try {
+		await fs.mkdir(executionDir, { recursive: true });
+		recordTiming("Created unique execution directory");
+
+		const container = await prepareFunctionContainer(
+			docker,
+			functionData,
+			files,
+			recordTiming
+		);
+
+		const execEnv = buildExecEnv(functionData);
+		const runnerScript =
+			runtimeType === "python"
+				? "/app/_runner.py"
+				: runtimeType === "golang"
+				? "/app/_runner.sh"
+				: null;
+		if (!runnerScript) {
+			throw new Error(
+				`Unsupported runtime type for exec command: ${runtimeType}`
+			);
 		}
+
+		// Spread payloads round-robin so every runner process gets an even share
+		const chunks: number[][] = Array.from({ length: workerCount }, () => []);
+		payloads.forEach((_, index) => chunks[index % workerCount].push(index));
+
+		// Once the batch is stopped (runtime cap hit or cancelled), running runners
+		// are killed and runners that have not started yet are skipped
+		let batchStopReason: string | null = null;
+		const activeRunners = new Set<(reason: string) => void>();
+		const stopBatch = (reason: string) => {
+			if (batchStopReason) return;
+			batchStopReason = reason;
+			activeRunners.forEach((stop) => stop(reason));
+		};
+		const batchDeadline = setTimeout(
+			() =>
+				stopBatch(
+					`Batch exceeded maximum runtime of ${MAX_BATCH_RUNTIME_MS / 1000}s`
+				),
+			MAX_BATCH_RUNTIME_MS
+		);
+		const onAbort = () => stopBatch("Batch cancelled by client");
+		if (signal?.aborted) onAbort();
+		signal?.addEventListener("abort", onAbort);
+
+		await Promise.all(
+			chunks.map(async (indexes, worker) => {
+				// Every finished payload is one "SHSF_BATCH_ITEM <json>" line on stdout
+				let lineBuffer = "";
+				const handleLine = (line: string) => {
+					const marker = "SHSF_BATCH_ITEM ";
+					if (!line.startsWith(marker)) {
+						if (line.trim()) {
+							logs.append(
+								`\n[Runner Warning] Unexpected content in stdout: ${line.trim()}`
+							);
+						}
+						return;
+					}
+					try {
+						const entry = JSON.parse(line.substring(marker.length));
+						armWatchdog();
+						report({
+							index: entry.index,
+							exit_code: entry.ok ? 0 : 1,
+							result: entry.ok ? entry.result : null,
+							...(entry.ok ? {} : { error: entry.error }),
+						});
+					} catch (e: any) {
+						logs.append(`\nError parsing batch result JSON from stdout: ${e.message}`);
+					}
+				};
+
+				// The function timeout applies per payload: the watchdog is re-armed
+				// every time the runner reports a result
+				const itemTimeoutMs = (functionData.timeout || 15) * 1000;
+				let watchdog: NodeJS.Timeout | undefined;
+				let runnerDone = false;
+				let stopRunner = (reason: string) => {};
+				const armWatchdog = () => {
+					if (runnerDone) return;
+					clearTimeout(watchdog);
+					watchdog = setTimeout(
+						() => stopRunner(`Payload timed out after ${itemTimeoutMs / 1000}s`),
+						itemTimeoutMs
+					);
+				};
+
+				const pidFileName = `batch_${worker}.pid`;
+				let runnerStarted = false;
+				let workerExitCode = 0;
+				let workerError = "";
+
+				try {
+					const batchFileName = `batch_${worker}.ndjson`;
+					await fs.writeFile(
+						path.join(executionDir, batchFileName),
+						indexes
+							.map((index) => `{"index":${index},"payload":${payloads[index]}}\n`)
+							.join("")
+					);
+
+					if (batchStopReason) {
+						throw new Error(batchStopReason);
+					}
+
+					// Record the runner PID so it can be killed when the watchdog fires
+					const exec = await container.exec({
+						Cmd: [
+							"/bin/sh",
+							"-c",
+							'echo $$ > "$1" && exec /bin/sh "$2" --batch "$3"',
+							"shsf_batch",
+							`/executions/${executionId}/${pidFileName}`,
+							runnerScript,
+							`/executions/${executionId}/${batchFileName}`,
+						],
+						Env: execEnv,
+						AttachStdout: true,
+						AttachStderr: true,
+						Tty: false,
+					});
+					const execStream = await exec.start({ hijack: true, stdin: false });
+					runnerStarted = true;
+
+					const stdoutMultiplex = new PassThrough();
+					const stderrMultiplex = new PassThrough();
+					stdoutMultiplex.setEncoding("utf8");
+					stderrMultiplex.setEncoding("utf8");
+
+					stdoutMultiplex.on("data", (text: string) => {
+						lineBuffer += text;
+						let newlineIdx: number;
+						while ((newlineIdx = lineBuffer.indexOf("\n")) !== -1) {
+							handleLine(lineBuffer.substring(0, newlineIdx));
+							lineBuffer = lineBuffer.substring(newlineIdx + 1);
+						}
+					});
+					stderrMultiplex.on("data", (text: string) => logs.append(text));
+
+					docker.modem.demuxStream(execStream, stdoutMultiplex, stderrMultiplex);
+
+					const execResultDetails = await new Promise<Docker.ExecInspectInfo>(
+						(resolve, reject) => {
+							stopRunner = (reason) => reject(new Error(reason));
+							activeRunners.add(stopRunner);
+							execStream.on("end", () => {
+								exec.inspect().then(resolve).catch(reject);
+							});
+							execStream.on("error", reject);
+							armWatchdog();
+							// The batch may have been stopped while the exec was starting
+							if (batchStopReason) stopRunner(batchStopReason);
+						}
+					);
+					if (lineBuffer) handleLine(lineBuffer);
+					workerExitCode = execResultDetails.ExitCode ?? 1;
+					workerError = `Runner exited with code ${workerExitCode} before reporting a result`;
+				} catch (execError: any) {
+					console.error(
+						`[executeFunctionBatch] Runner ${worker} failed or timed out:`,
+						execError.message
+					);
+					logs.append(`\nExecution Error: ${execError.message}`);
+					workerExitCode = -1;
+					workerError = execError.message;
+					// A docker exec keeps running inside the container unless it is killed
+					if (runnerStarted) {
+						await killBatchRunner(
+							docker,
+							container,
+							path.join(executionDir, pidFileName)
+						);
+					}
+				} finally {
+					runnerDone = true;
+					clearTimeout(watchdog);
+					activeRunners.delete(stopRunner);
+				}
+
+				if (workerExitCode !== 0) {
+					exitCode = workerExitCode;
+				}
+				// Anything the runner did not report on (crash, timeout) counts as failed
+				indexes.forEach((index) =>
+					report({
+						index,
+						exit_code: workerExitCode === 0 ? -1 : workerExitCode,
+						result: null,
+						error: workerExitCode === 0 ? "No result reported by runner" : workerError,
+					})
+				);
+			})
+		);
+		clearTimeout(batchDeadline);
+		signal?.removeEventListener("abort", onAbort);
+		recordTiming(`Batch of ${payloads.length} payloads finished on ${workerCount} runner(s)`);
+	} catch (error: any) {
+		console.error(
+			`[executeFunctionBatch] Critical error during batch execution of function ${id}:`,
+			error
+		);
+		recordTiming("Critical error occurred");
+		logs.append(`\nCritical Error: ${error.message}\n${error.stack}`);
+		exitCode = error.statusCode || -3; // Custom code for unhandled errors
+		payloads.forEach((_, index) =>
+			report({
+				index,
+				exit_code: exitCode,
+				result: null,
+				error: "Sorry, an error occurred during execution.",
+			})
+		);
+	} finally {
+		tooks.push({
+			timestamp: Date.now(),
+			value: (Date.now() - starting_time) / 1000,
+			description: "Total batch execution time (including potential setup)",
+		});
+
+		await removeExecutionDir(executionDir, recordTiming);
+
+		console.log(
+			`[SHSF BATCH] Function ${functionData.id} (${functionData.name}) processed ${
+				payloads.length
+			} payloads (${succeeded} succeeded). Total time: ${
+				(Date.now() - starting_time) / 1000
+			} seconds`
+		);
+
+		// One aggregated log record for the whole batch
+		await getExecutionStore().recordExecution(id, {
+			logs: logs.text,
+			exit_code: exitCode,
+			tooks,
+			output: JSON.stringify({
+				batch: true,
+				total: payloads.length,
+				succeeded,
+				failed: payloads.length - succeeded,
+				parallelism: workerCount,
+			}),
+			payload: payloads.join("\n"),
+		});
 	}
+
+	return {
+		logs: logs.text,
+		tooks,
+		exit_code: exitCode,
+		total: payloads.length,
+		succeeded,
+		failed: payloads.length - succeeded,
+	};
 }
 
 export async function buildPayloadFromGET(
@@ -1497,6 +1986,34 @@ export async function buildPayloadFromPOST(
 	};
 }
 
+// Parses a batch body as a JSON array ("json") or as NDJSON, one JSON value per
+// line ("ndjson"). The format comes from the request, since a line of NDJSON may
+// itself be an array. Returns null if the body does not match the format.
+export function parseBatchBody(
+	raw: string,
+	format: "json" | "ndjson"
+): any[] | null {
+	if (format === "json") {
+		try {
+			const parsed = JSON.parse(raw);
+			return Array.isArray(parsed) ? parsed : null;
+		} catch {
+			return null;
+		}
+	}
+
+	const items: any[] = [];
+	for (const line of raw.split("\n")) {
+		if (!line.trim()) continue;
+		try {
+			items.push(JSON.parse(line));
+		} catch {
+			return null;
+		}
+	}
+	return items;
+}
+
 export async function installDependencies(
 	functionId: number,
 	functionData: any,
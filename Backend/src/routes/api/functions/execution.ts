@@ -5,8 +5,11 @@ import {
 	buildPayloadFromGET,
 	buildPayloadFromPOST,
 	cleanupFunctionContainer,
-	executeFunction,
+	MAX_BATCH_PARALLELISM,
+	MAX_BATCH_SIZE,
+	parseBatchBody,
 } from "../../../lib/Runner";
+import { runFunction, runFunctionBatch } from "../../../lib/ExecutionPool";
 
 export = new fileRouter.Path("/")
 	.http("GET", "/api/exec/{namespaceId}/{functionId}", (http) =>
@@ -78,7 +81,7 @@ export = new fileRouter.Path("/")
 				const payload = await buildPayloadFromGET(ctr);
 
 				// Execute with run parameter instead of inject.json
-				const result = await executeFunction(
+				const result = await runFunction(
 					functionData.id,
 					functionData,
 					functionData.files,
@@ -205,7 +208,7 @@ export = new fileRouter.Path("/")
 				// Build the payload from POST request
 				const payload = await buildPayloadFromPOST(ctr);
 
-				const result = await executeFunction(
+				const result = await runFunction(
 					functionData.id,
 					functionData,
 					functionData.files,
@@ -330,7 +333,7 @@ export = new fileRouter.Path("/")
 				const payload = await buildPayloadFromGET(ctr);
 
 				// Execute with run parameter instead of inject.json
-				const result = await executeFunction(
+				const result = await runFunction(
 					functionData.id,
 					functionData,
 					functionData.files,
@@ -455,7 +458,7 @@ export = new fileRouter.Path("/")
 				// Build the payload from POST request
 				const payload = await buildPayloadFromPOST(ctr);
 
-				const result = await executeFunction(
+				const result = await runFunction(
 					functionData.id,
 					functionData,
 					functionData.files,
@@ -582,7 +585,7 @@ export = new fileRouter.Path("/")
 				const payload = await buildPayloadFromGET(ctr);
 
 				// Execute with run parameter instead of inject.json
-				const result = await executeFunction(
+				const result = await runFunction(
 					functionData.id,
 					functionData,
 					functionData.files,
@@ -709,7 +712,7 @@ export = new fileRouter.Path("/")
 				// Build the payload from POST request
 				const payload = await buildPayloadFromPOST(ctr);
 
-				const result = await executeFunction(
+				const result = await runFunction(
 					functionData.id,
 					functionData,
 					functionData.files,
@@ -766,4 +769,188 @@ export = new fileRouter.Path("/")
 
 				return ctr.print(result?.result ?? "No Function Result :(");
 			})
+	)
+	.http("POST", "/api/batch/{namespaceId}/{functionId}", (http) =>
+		http
+			.ratelimit((limit) =>
+				limit
+					.hits(5)
+					.window(parseInt(env.RATELIMIT!) || 0)
+					.penalty(400)
+			)
+			.onRequest(async (ctr) => {
+				const namespaceId = parseInt(ctr.params.get("namespaceId") || "");
+				const functionId = ctr.params.get("functionId") || "";
+
+				if (isNaN(namespaceId)) {
+					return ctr.status(ctr.$status.BAD_REQUEST).print({
+						status: 400,
+						message: "Invalid namespace",
+					});
+				}
+
+				const functionData = await prisma.function.findFirst({
+					where: {
+						executionId: functionId,
+						namespaceId: namespaceId,
+					},
+					include: {
+						namespace: { select: { name: true, id: true } },
+						files: true,
+					},
+				});
+
+				if (!functionData) {
+					return ctr.status(ctr.$status.NOT_FOUND).print({
+						status: 404,
+						message: "Function not found",
+					});
+				}
+
+				if (!functionData.allow_http) {
+					return ctr.status(ctr.$status.FORBIDDEN).print({
+						status: 403,
+						message: "HTTP execution is not allowed for this function",
+					});
+				}
+
+				// --- streamlined permission check ---
+				const permissionToExecute = await checkHttpExecutionPermission(
+					ctr,
+					functionData,
+					namespaceId,
+					functionId
+				);
+
+				if (permissionToExecute.redirect) {
+					return ctr
+						.status(ctr.$status.TEMPORARY_REDIRECT)
+						.redirect(permissionToExecute.redirect);
+				}
+				if (!permissionToExecute.state) {
+					return ctr.status(ctr.$status.FORBIDDEN).print({
+						status: 403,
+						message: permissionToExecute.reason,
+					});
+				}
+				// --- end streamlined ---
+
+				// Body is either a JSON array or NDJSON, one payload per entry
+				const contentType = (ctr.headers.get("content-type") || "")
+					.split(";")[0]
+					.trim()
+					.toLowerCase();
+				const format =
+					contentType === "application/json"
+						? "json"
+						: contentType === "application/x-ndjson"
+						? "ndjson"
+						: null;
+				if (!format) {
+					return ctr.status(ctr.$status.BAD_REQUEST).print({
+						status: 400,
+						message:
+							"Content-Type must be application/json (JSON array) or application/x-ndjson",
+					});
+				}
+
+				const items = parseBatchBody(await ctr.rawBody("utf-8"), format);
+				if (!items || items.length === 0) {
+					return ctr.status(ctr.$status.BAD_REQUEST).print({
+						status: 400,
+						message:
+							format === "json"
+								? "Body must be a non-empty JSON array"
+								: "Body must be a non-empty NDJSON stream",
+					});
+				}
+				if (items.length > MAX_BATCH_SIZE) {
+					return ctr.status(ctr.$status.BAD_REQUEST).print({
+						status: 400,
+						message: `Batch exceeds maximum size of ${MAX_BATCH_SIZE} payloads`,
+					});
+				}
+
+				const parallel = parseInt(ctr.queries.get("parallel") || "4");
+				if (isNaN(parallel) || parallel < 1 || parallel > MAX_BATCH_PARALLELISM) {
+					return ctr.status(ctr.$status.BAD_REQUEST).print({
+						status: 400,
+						message: `parallel must be between 1 and ${MAX_BATCH_PARALLELISM}`,
+					});
+				}
+
+				// Every item is delivered like a regular POST exec with the item as body
+				const headers = Object.fromEntries(ctr.headers.entries());
+				const queries = Object.fromEntries(ctr.queries.entries());
+				const source_ip = ctr.client.ip.usual();
+				const payloads = items.map((item, index) => {
+					const body = JSON.stringify(item);
+					return JSON.stringify({
+						ran_by: "batch",
+						headers,
+						queries,
+						body,
+						raw_body: body,
+						source_ip,
+						route: "default",
+						method: "POST",
+						batch_index: index,
+					});
+				});
+
+				// Results are streamed as NDJSON in completion order
+				ctr.headers.set("Content-Type", "application/x-ndjson");
+				return ctr.printChunked(
+					(print) =>
+						new Promise<void>((end) => {
+							// Cancels the batch once the client goes away
+							const abort = new AbortController();
+							let printing: Promise<void> = Promise.resolve();
+							// The chain never rejects, a failed write means the client is gone
+							const send = (line: object) => {
+								if (abort.signal.aborted) return printing;
+								return (printing = printing
+									.then(async () => {
+										if (abort.signal.aborted) return;
+										await print(JSON.stringify(line) + "\n");
+									})
+									.catch(() => abort.abort()));
+							};
+
+							runFunctionBatch(
+								functionData.id,
+								functionData,
+								functionData.files,
+								payloads,
+								parallel,
+								(item) => send({ type: "result", ...item }),
+								abort.signal
+							)
+								.then(async (summary) => {
+									await send({
+										type: "end",
+										exitCode: summary.exit_code,
+										total: summary.total,
+										succeeded: summary.succeeded,
+										failed: summary.failed,
+										took: summary.tooks,
+									});
+									end();
+								})
+								.catch(async (error) => {
+									await send({
+										type: "error",
+										error: error.message || "Batch execution failed",
+									});
+									end();
+								});
+
+							ctr.$abort(() => {
+								// Skips the remaining runners and kills the running ones
+								abort.abort();
+								end();
+							});
+						})
+				);
+			})
 	);
@@ -6,10 +6,8 @@ import {
 	prisma,
 } from "../../..";
 import { checkAuthentication } from "../../../lib/Authentication";
-import {
-	cleanupFunctionContainer,
-	executeFunction,
-} from "../../../lib/Runner";
+import { cleanupFunctionContainer } from "../../../lib/Runner";
+import { runFunction } from "../../../lib/ExecutionPool";
 import Docker from "dockerode";
 
 const Images: string[] = [
@@ -635,7 +633,7 @@ export = new fileRouter.Path("/")
 					.optional()
 			);
 
-			// Convert run data to string for passing to executeFunction
+			// Convert run data to string for passing to runFunction
 			const runPayload = JSON.stringify({
 				// if there is a .method we will remove it
 				body: runData?.run ? runData.run : {},
@@ -701,7 +699,7 @@ export = new fileRouter.Path("/")
 						(print) =>
 							new Promise<void>((end) => {
 								let output = "";
-								executeFunction(
+								runFunction(
 									functionId,
 									functionData,
 									files,
@@ -757,7 +755,7 @@ export = new fileRouter.Path("/")
 					);
 				} else {
 					// Synchronous mode
-					const result = await executeFunction(
+					const result = await runFunction(
 						functionId,
 						functionData,
 						files,
@@ -1,11 +1,21 @@
 import { fileRouter } from "..";
+import { getExecutionPoolStats } from "../lib/ExecutionPool";
 
 export = new fileRouter.Path("/").http("GET", "/health", (http) =>
 	http
 		.ratelimit((limit) => limit.hits(1).window(2000).penalty(100))
 		.onRequest(async (ctr) => {
+			const execution = getExecutionPoolStats();
+			if (!execution.healthy) {
+				return ctr.status(ctr.$status.SERVICE_UNAVAILABLE).print({
+					status: "DEGRADED",
+					execution,
+				});
+			}
+
 			return ctr.print({
 				status: "OK",
+				execution,
 			});
 		}),
 );
@@ -32,6 +32,14 @@ program
 	.option("--list", "List ignored patterns (for ignore mode)")
 	.option("--remove", "Remove pattern from ignore list (for ignore mode)")
 	.option("--url <url>", "Set SHSF instance base URL (for set-url mode)")
+	.option(
+		"--batch <file>",
+		"JSON array or NDJSON file of payloads to run in one batch, - for stdin (for exec mode)",
+	)
+	.option(
+		"--parallel <n>",
+		"Number of runner processes used for a batch (for exec mode, default: 4)",
+	)
 	.parse(process.argv);
 
 const opts = program.opts();
@@ -797,6 +805,89 @@ async function execFunctionAndLog(namespaceId, route) {
 	}
 }
 
+// Run a batch of payloads and print each result as it completes
+async function execBatch(namespaceId, functionId) {
+	let input;
+	if (opts.batch === "-") {
+		const chunks = [];
+		for await (const chunk of process.stdin) chunks.push(chunk);
+		input = Buffer.concat(chunks).toString("utf-8");
+	} else {
+		if (!fsSync.existsSync(opts.batch)) {
+			console.error(chalk.red(`Error: Batch file '${opts.batch}' does not exist.`));
+			process.exit(1);
+		}
+		input = await fs.readFile(opts.batch, "utf-8");
+	}
+
+	// .ndjson/.jsonl files are always NDJSON and .json files a JSON array,
+	// anything else (including stdin) is a JSON array only if it parses as one
+	const extension = opts.batch === "-" ? "" : path.extname(opts.batch).toLowerCase();
+	let isJsonArray;
+	if (extension === ".ndjson" || extension === ".jsonl") {
+		isJsonArray = false;
+	} else if (extension === ".json") {
+		isJsonArray = true;
+	} else {
+		try {
+			isJsonArray = Array.isArray(JSON.parse(input));
+		} catch {
+			isJsonArray = false;
+		}
+	}
+
+	const parallel = opts.parallel ? parseInt(opts.parallel) : 4;
+	if (isNaN(parallel) || parallel < 1) {
+		console.error(chalk.red("Error: --parallel must be a positive number"));
+		process.exit(1);
+	}
+
+	console.log(chalk.cyan(`Executing batch (parallel ${parallel})...`));
+	let response;
+	try {
+		response = await axios({
+			method: "POST",
+			url: `${AppState.base_url}/batch/${namespaceId}/${functionId}?parallel=${parallel}`,
+			headers: {
+				...AppState.headers,
+				"Content-Type": isJsonArray ? "application/json" : "application/x-ndjson",
+			},
+			data: input,
+			responseType: "stream",
+			transformRequest: [(data) => data], // Send the file as-is
+		});
+	} catch (error) {
+		console.error(chalk.red(`API Error: ${error.message}`));
+		if (error.response) {
+			console.error(chalk.red(`Status: ${error.response.status}`));
+		}
+		process.exit(1);
+	}
+
+	// Results arrive as NDJSON in completion order
+	const lines = readline.createInterface({ input: response.data });
+	for await (const line of lines) {
+		if (!line.trim()) continue;
+		const data = JSON.parse(line);
+		if (data.type === "result") {
+			const color = data.exit_code === 0 ? chalk.green : chalk.red;
+			console.log(
+				color(`[${data.index}]`),
+				data.exit_code === 0
+					? JSON.stringify(data.result)
+					: `${data.error || "failed"} (exit code ${data.exit_code})`,
+			);
+		} else if (data.type === "end") {
+			console.log(
+				chalk.green("\n=== Batch Finished ===\n"),
+				`${data.succeeded}/${data.total} succeeded, ${data.failed} failed`,
+			);
+		} else if (data.type === "error") {
+			console.error(chalk.red("✗ Batch failed:"), data.error);
+		}
+	}
+}
+
 // Main execution
 async function main() {
 	// Handle set-key mode
@@ -1063,6 +1154,11 @@ async function main() {
 			process.exit(1);
 		}
 
+		if (opts.batch) {
+			await execBatch(namespaceId, functionId);
+			return;
+		}
+
 		const method = opts.method ? opts.method.toUpperCase() : "POST";
 		const route = opts.route ?? "";
 		let endpoint = `/exec/${namespaceId}/${functionId}/${route}`;